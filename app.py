@@ -1,19 +1,36 @@
 import os
 import uuid
 from datetime import datetime
-import shutil
-import tempfile
 import streamlit as st
 import zipfile
+import tempfile
 import io
 import logging
-import easyocr
-from pdf2image import convert_from_bytes
+import threading
+from contextlib import contextmanager
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from reportlab import rl_config
 from reportlab.pdfgen import canvas
+from reportlab.pdfbase import pdfdoc
 from reportlab.lib.utils import ImageReader
-from PyPDF2 import PdfReader
 import numpy as np
 
+# Required libraries, checked once at import; main() reports any that are missing
+MISSING_TOOLS = []
+try:
+    import easyocr
+except ImportError:
+    MISSING_TOOLS.append('easyocr')
+try:
+    from pdf2image import convert_from_path, pdfinfo_from_bytes
+except ImportError:
+    MISSING_TOOLS.append('pdf2image')
+try:
+    import cv2
+except ImportError:
+    MISSING_TOOLS.append('opencv-python-headless')
+
 # Fix for Pillow compatibility with older libraries
 try:
     from PIL import Image
@@ -32,6 +49,9 @@ except ImportError:
 from PIL import Image as PILImage
 PILImage.MAX_IMAGE_PIXELS = None  # Remove the limit, but we'll add our own checks
 
+# Write image streams as binary; ASCII85 inflates every embedded image by 25%
+rl_config.useA85 = 0
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -40,10 +60,32 @@ logger = logging.getLogger(__name__)
 MAX_FILE_SIZE_MB = 50
 MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
 DEFAULT_MAX_OUTPUT_PDF_SIZE_MB = 10  # Default maximum size for output PDFs
+RASTER_JPEG_QUALITY = 95  # Quality of the page images returned by pdf2image
+RASTER_CHUNK_PAGES = 16  # Pages rasterized per pdf2image call; bounds decoded pages held in memory
+PDF_BASE_OVERHEAD_BYTES = 2048  # Upper bound on a one-page PDF's size beyond its embedded JPEG
+PDF_MIN_OVERHEAD_BYTES = 1024  # Lower bound on the same
+PDF_BYTES_PER_OCR_BOX = 80  # Upper bound on the compressed text overlay per OCR box, excluding its text
+PDF_BYTES_PER_OCR_CHAR = 1  # Upper bound on the compressed overlay per character of OCR text
+OCR_FONT_SIZE_STEP = 2  # Overlay font sizes are rounded to this many points
+PDF_BUILD_WORKERS = min(4, os.cpu_count() or 1)  # Threads building page PDFs (JPEG encoding releases the GIL)
+OCR_MAX_LONG_EDGE = 2000  # Pages are downscaled to this long edge (pixels) for OCR only
+OCR_PAGE_BATCH_SIZE = 4  # Pages sent through the EasyOCR detector per batched call
+OCR_RECOGNIZER_BATCH_SIZE = 64  # Text crops per recognizer pass on CUDA/MPS (EasyOCR defaults to 1); on CPU EasyOCR ignores it and recognizes crops one at a time
+COMPILE_OCR_DETECTOR = True  # torch.compile the detector on CUDA (compiled once per server process)
+BILEVEL_SAMPLE_STEP = 4  # Every Nth pixel in each direction is sampled to classify a page as black-and-white
+BILEVEL_MIN_EXTREME_FRACTION = 0.97  # Share of sampled pixels that must be near black or white
+BILEVEL_MAX_COLOR_FRACTION = 0.001  # Share of sampled pixels allowed to be visibly colored
+BILEVEL_EDGE_RADIUS = 2  # Mid-gray pixels within this many pixels of black ink count as anti-aliased edges
+BILEVEL_MAX_STRAY_GRAY_FRACTION = 0.0005  # Share of pixels allowed to be mid-gray away from ink (photos, gray fills, light text)
+ZIP_SPOOL_MAX_BYTES = 64 * 1024 * 1024  # ZIP archives larger than this are spooled to a temp file
+PDF_HEADER_MARKER = b"%PDF-"
+PDF_EOF_MARKER = b"%%EOF"
 
+@st.cache_resource(show_spinner=False)
 def check_gpu_availability():
     """
     Checks if GPU is available for EasyOCR.
+    Cached for the server process so the probe runs once, not once per file.
     Returns (gpu_available, gpu_info)
     """
     try:
@@ -53,43 +95,138 @@ def check_gpu_availability():
             gpu_count = torch.cuda.device_count()
             gpu_name = torch.cuda.get_device_name(0) if gpu_count > 0 else "Unknown GPU"
             return True, f"{gpu_name} ({gpu_count} device{'s' if gpu_count > 1 else ''})"
+        
+        # EasyOCR also uses Apple's Metal backend when asked for a GPU; check it directly
+        # rather than loading a Reader just to probe
+        mps_backend = getattr(torch.backends, 'mps', None)
+        if mps_backend is not None and mps_backend.is_available():
+            return True, "Apple Metal (MPS)"
     except ImportError:
         pass
     
+    return False, "No GPU available - using CPU"
+
+@contextmanager
+def ocr_inference_context():
+    """
+    Context manager OCR calls should run under.
+    torch.inference_mode skips the autograd bookkeeping (version counters, view
+    tracking) that EasyOCR's own no_grad blocks still pay for.
+    """
     try:
-        # Fallback: Try EasyOCR's own GPU detection
-        import easyocr
-        # Create a temporary reader to test GPU
-        test_reader = easyocr.Reader(['en'], gpu=True, verbose=False)
-        return True, "GPU detected by EasyOCR"
-    except Exception:
-        pass
+        import torch
+    except ImportError:
+        yield
+        return
     
-    return False, "No GPU available - using CPU"
+    with torch.inference_mode():
+        yield
+
+def enable_float16_autocast(model):
+    """
+    Runs the model's forward pass under CUDA float16 autocast, which uses the
+    tensor cores and halves activation memory traffic, and casts its outputs back
+    to float32. EasyOCR post-processes the detector's score maps with OpenCV
+    (cv2.threshold rejects float16) and multiplies recognizer probabilities along
+    each string, so only the forward pass itself runs in half precision. The
+    weights stay in FP32 so EasyOCR's own float32 input tensors keep working.
+    """
+    import torch
+    forward = model.forward
+    
+    def autocast_forward(*args, **kwargs):
+        with torch.autocast(device_type='cuda', dtype=torch.float16):
+            output = forward(*args, **kwargs)
+        if isinstance(output, tuple):
+            return tuple(tensor.float() for tensor in output)
+        return output.float()
+    
+    model.forward = autocast_forward
+
+def enable_eager_fallback(detector, eager_module):
+    """
+    Makes the DataParallel detector switch back to eager_module for good if a
+    forward pass through its compiled module fails, e.g. when a new page shape
+    triggers a recompile that errors. The failed pass is retried eagerly, so no
+    page loses its OCR to a compiler problem. Out-of-memory errors are passed on
+    unchanged, since the eager module would need the same memory.
+    """
+    import torch
+    forward = detector.forward
+    
+    def fallback_forward(*args, **kwargs):
+        if detector.module is eager_module:
+            return forward(*args, **kwargs)
+        try:
+            return forward(*args, **kwargs)
+        except torch.cuda.OutOfMemoryError:
+            raise
+        except Exception as e:
+            logger.warning(f"Compiled OCR detector failed, using the uncompiled detector from now on: {e}")
+            detector.module = eager_module
+            return forward(*args, **kwargs)
+    
+    detector.forward = fallback_forward
+
+@st.cache_resource(show_spinner=False)
+def get_ocr_reader(use_gpu):
+    """
+    Returns a shared EasyOCR reader.
+    The model weights are loaded once and reused across files and Streamlit reruns.
+    """
+    logger.info(f"Loading EasyOCR reader (gpu={use_gpu})")
+    # cudnn_benchmark lets cuDNN pick the fastest kernels for the (mostly fixed) page size
+    reader = easyocr.Reader(['en'], gpu=use_gpu, cudnn_benchmark=use_gpu)
+    
+    if use_gpu:
+        if str(reader.device).startswith('cuda'):
+            import torch
+            # TF32 convolutions and matmuls on Ampere+; detector scores are thresholded,
+            # so the reduced mantissa doesn't change the detected boxes
+            torch.backends.cuda.matmul.allow_tf32 = True
+            torch.backends.cudnn.allow_tf32 = True
+            
+            enable_float16_autocast(reader.detector)
+            enable_float16_autocast(reader.recognizer)
+            
+            # Page sizes vary between documents, so compile with dynamic shapes
+            # rather than recompiling for every new size. On CUDA EasyOCR wraps the
+            # detector in nn.DataParallel; compile the module inside it so Dynamo
+            # doesn't trace DataParallel's scatter/replicate
+            if COMPILE_OCR_DETECTOR and hasattr(torch, 'compile'):
+                eager_detector = reader.detector.module
+                reader.detector.module = torch.compile(eager_detector, dynamic=True)
+                enable_eager_fallback(reader.detector, eager_detector)
+        
+        # Warm up CUDA context and kernels once, so the first document doesn't pay for it
+        # (this is also where torch.compile does its first compilation)
+        try:
+            with ocr_inference_context():
+                reader.readtext_batched(np.zeros((OCR_PAGE_BATCH_SIZE, 640, 480, 3), dtype=np.uint8))
+        except Exception as e:
+            logger.warning(f"EasyOCR warmup failed: {e}")
+    
+    return reader
 
-def validate_pdf_file(pdf_file, pdf_name):
+def validate_pdf_file(pdf_data, pdf_name):
     """
-    Validates uploaded PDF file for size and format.
+    Validates uploaded PDF data for size and format.
+    Takes the raw PDF bytes so the upload is only copied once. The format check
+    only sniffs the header and trailer; poppler reports unreadable files itself.
     Returns (is_valid, error_message)
     """
     try:
         # Check file size
-        pdf_file.seek(0, 2)  # Seek to end
-        file_size = pdf_file.tell()
-        pdf_file.seek(0)  # Reset to beginning
+        file_size = len(pdf_data)
         
         if file_size > MAX_FILE_SIZE_BYTES:
             return False, f"File size ({file_size / 1024 / 1024:.1f}MB) exceeds limit of {MAX_FILE_SIZE_MB}MB"
         
-        # Validate PDF format
-        try:
-            pdf_reader = PdfReader(pdf_file)
-            if len(pdf_reader.pages) == 0:
-                return False, "PDF file contains no pages"
-        except Exception as e:
-            return False, f"Invalid PDF format: {str(e)}"
-        finally:
-            pdf_file.seek(0)  # Reset for processing
+        # Validate PDF format: header near the start, EOF marker near the end
+        if PDF_HEADER_MARKER not in pdf_data[:1024]:
+            return False, "Invalid PDF format: missing %PDF- header"
+        if PDF_EOF_MARKER not in pdf_data[-1024:]:
+            return False, "Invalid PDF format: missing %%EOF marker (file may be truncated)"
         
         return True, None
         
@@ -97,32 +234,292 @@ def validate_pdf_file(pdf_file, pdf_name):
         logger.error(f"Error validating {pdf_name}: {e}")
         return False, f"Validation error: {str(e)}"
 
-def check_external_tools():
+@st.cache_data(show_spinner=False)
+def count_pdf_pages(file_id, _pdf_data):
     """
-    Checks if required Python libraries are available.
-    Returns (tools_available, missing_tools)
+    Counts the pages of an uploaded PDF for progress reporting.
+    Cached by upload file_id (the bytes are not hashed), so reruns and repeated
+    clicks don't run pdfinfo on the same PDF again.
+    Returns page_count, or None if the PDF can't be read
     """
-    missing_tools = []
-    
     try:
-        import easyocr
-    except ImportError:
-        missing_tools.append('easyocr')
+        # Same page count poppler reports when the file is processed
+        return pdfinfo_from_bytes(_pdf_data)['Pages']
+    except Exception as e:
+        logger.warning(f"Could not count pages of upload {file_id}: {e}")
+        return None
+
+class CCITTImageXObject(pdfdoc.PDFImageXObject):
+    """
+    Image XObject for a 1-bit image encoded as CCITT Group 4 (fax).
+    PDFImageXObject writes no DecodeParms, which the CCITTFaxDecode filter needs.
+    """
+    def __init__(self, name, g4_data, width, height):
+        super().__init__(name)
+        self.width = width
+        self.height = height
+        self.bitsPerComponent = 1
+        self.colorSpace = 'DeviceGray'
+        self.streamContent = g4_data
     
-    try:
-        from pdf2image import convert_from_bytes
-    except ImportError:
-        missing_tools.append('pdf2image')
+    def format(self, document):
+        stream = pdfdoc.PDFStream(content=self.streamContent)
+        stream.dictionary.dict.update({
+            "Type": pdfdoc.PDFName("XObject"),
+            "Subtype": pdfdoc.PDFName("Image"),
+            "Width": self.width,
+            "Height": self.height,
+            "BitsPerComponent": 1,
+            "ColorSpace": pdfdoc.PDFName("DeviceGray"),
+            # A single filter name, not an array: an array Filter needs an array DecodeParms
+            "Filter": pdfdoc.PDFName("CCITTFaxDecode"),
+            # libtiff's encoder codes black pixels as 1 bits
+            "DecodeParms": pdfdoc.PDFDictionary({"K": -1, "Columns": self.width, "Rows": self.height, "BlackIs1": "true"}),
+            "Length": len(self.streamContent),
+        })
+        return stream.format(document)
+
+def draw_page_image(c, image_object, width, height):
+    """
+    Draws the image XObject as the full-page background of canvas c.
+    Does what Canvas.drawImage does, but registers the XObject under its own fixed
+    name. drawImage names each image by an MD5 of its decoded pixels so repeats are
+    stored once; with one image per page that only decodes the JPEG a second time.
+    """
+    name = image_object.name
+    reg_name = c._doc.getXObjectName(name)
+    c._setXObjects(image_object)
+    c._doc.Reference(image_object, reg_name)
+    c._doc.addForm(name, image_object)
+    c._currentPageHasImages = 1
     
-    return len(missing_tools) == 0, missing_tools
+    c.saveState()
+    c.scale(width, height)
+    c._code.append(f"/{reg_name} Do")
+    c.restoreState()
+    c._formsinuse.append(name)
 
-def create_searchable_pdf(image, ocr_results, output_path, max_size_mb=DEFAULT_MAX_OUTPUT_PDF_SIZE_MB):
+def create_pdf_with_image(img, ocr_data, scale=(1.0, 1.0)):
+    """
+    Creates a single-page PDF with the given image as background and the OCR
+    text as an invisible overlay.
+    img is a PIL image, JPEG bytes or a prepared CCITTImageXObject; JPEG bytes are
+    embedded verbatim (DCTDecode), so the page's size is the JPEG's size plus a
+    small, predictable overhead.
+    OCR boxes are multiplied by scale (width_scale, height_scale) when the image
+    was resized after OCR.
+    Returns the PDF data as bytes.
+    """
+    if isinstance(img, CCITTImageXObject):
+        image_object = img
+    else:
+        image_object = pdfdoc.PDFImageXObject("PageImage", ImageReader(io.BytesIO(img) if isinstance(img, bytes) else img))
+    img_width, img_height = image_object.width, image_object.height
+    pdf_buffer = io.BytesIO()
+    # pageCompression Flate-compresses the text overlay's content stream
+    c = canvas.Canvas(pdf_buffer, pagesize=(img_width, img_height), pageCompression=1)
+    
+    # Add the image as background
+    draw_page_image(c, image_object, img_width, img_height)
+    
+    # Filter and place all OCR boxes in one vectorized pass
+    confidences = np.array([confidence for (_, _, confidence) in ocr_data], dtype=np.float64)
+    keep = np.flatnonzero(confidences > 0.5)
+    
+    # Add invisible OCR text overlay as a single text object; render mode 3
+    # keeps the text searchable without painting it
+    text_object = c.beginText()
+    text_object.setTextRenderMode(3)
+    if keep.size:
+        bboxes = np.array([ocr_data[i][0] for i in keep], dtype=np.float64).reshape(-1, 4, 2)
+        bboxes *= scale
+        
+        xs = bboxes[:, 0, 0]
+        ys = img_height - bboxes[:, 2, 1]
+        # Quantize font sizes so neighbouring boxes (e.g. words on one line) share a
+        # size and the font only needs to be set when it changes
+        font_sizes = np.maximum(8, np.round((bboxes[:, 2, 1] - bboxes[:, 0, 1]) * 0.8 / OCR_FONT_SIZE_STEP) * OCR_FONT_SIZE_STEP)
+        
+        current_font_size = None
+        for i, x, y, font_size in zip(keep, xs.tolist(), ys.tolist(), font_sizes.tolist()):
+            if font_size != current_font_size:
+                text_object.setFont("Helvetica", font_size)
+                current_font_size = font_size
+            text_object.setTextOrigin(x, y)
+            # Trailing space keeps separate boxes from running together in text extraction
+            text_object.textOut(ocr_data[i][1] + " ")
+    c.drawText(text_object)
+    
+    c.save()
+    return pdf_buffer.getvalue()
+
+def flatten_to_rgb(image):
+    """
+    Composites an RGBA image onto white so it can be JPEG-encoded.
+    Other modes are returned unchanged (no copy).
+    Returns the image
+    """
+    if image.mode != 'RGBA':
+        return image
+    rgb_image = PILImage.new('RGB', image.size, (255, 255, 255))
+    rgb_image.paste(image, mask=image.split()[-1])
+    return rgb_image
+
+def encode_jpeg(image, quality):
+    """
+    Encodes the image as JPEG at the given quality.
+    Returns the JPEG data as bytes.
+    """
+    jpeg_buffer = io.BytesIO()
+    image.save(jpeg_buffer, format='JPEG', quality=quality)
+    return jpeg_buffer.getvalue()
+
+def is_bilevel_page(image):
+    """
+    Checks whether a page is black-and-white content (text, line art) that can be
+    stored as a 1-bit image without visible loss: almost no colored pixels, almost
+    every pixel close to black or white, and mid-gray pixels only along the edges
+    of black ink. The color and black/white checks examine a sample of pixels.
+    Returns True if the page is bilevel
+    """
+    image = flatten_to_rgb(image)
+    width, height = image.size
+    sample = image.resize((max(1, width // BILEVEL_SAMPLE_STEP), max(1, height // BILEVEL_SAMPLE_STEP)), PILImage.NEAREST)
+    pixels = np.asarray(sample.convert('RGB'), dtype=np.int16)
+    
+    color_spread = pixels.max(axis=2) - pixels.min(axis=2)
+    if np.mean(color_spread > 48) > BILEVEL_MAX_COLOR_FRACTION:
+        return False
+    
+    gray = pixels.mean(axis=2)
+    if np.mean((gray < 64) | (gray > 191)) < BILEVEL_MIN_EXTREME_FRACTION:
+        return False
+    
+    # Anti-aliasing leaves mid-gray pixels next to black ink; mid-grays away from it
+    # are a photo, a gray fill or light-gray text, which thresholding would destroy.
+    # Edges are only a pixel or two wide, so this check needs full resolution.
+    gray = np.asarray(image.convert('L'))
+    edge_size = 2 * BILEVEL_EDGE_RADIUS + 1
+    near_ink = cv2.dilate(cv2.inRange(gray, 0, 63), np.ones((edge_size, edge_size), np.uint8))
+    stray_gray = cv2.bitwise_and(cv2.inRange(gray, 64, 191), cv2.bitwise_not(near_ink))
+    return cv2.countNonZero(stray_gray) <= BILEVEL_MAX_STRAY_GRAY_FRACTION * gray.size
+
+def encode_bilevel(image):
+    """
+    Binarizes the image with Otsu's threshold and encodes it as CCITT Group 4.
+    Returns a CCITTImageXObject for create_pdf_with_image
+    """
+    gray = np.asarray(flatten_to_rgb(image).convert('L'))
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    bilevel_image = PILImage.fromarray(binary > 0)
+    
+    # Write a single-strip Group 4 TIFF and take the strip's data out of it
+    tiff_buffer = io.BytesIO()
+    bilevel_image.save(tiff_buffer, format='TIFF', compression='group4', tiffinfo={278: bilevel_image.size[1]})  # 278 = RowsPerStrip
+    tiff_image = PILImage.open(tiff_buffer)
+    strip_offset = tiff_image.tag_v2[273][0]  # StripOffsets
+    strip_length = tiff_image.tag_v2[279][0]  # StripByteCounts
+    g4_data = tiff_buffer.getvalue()[strip_offset:strip_offset + strip_length]
+    return CCITTImageXObject("PageImage", g4_data, *bilevel_image.size)
+
+def create_bilevel_pdf(image, ocr_results, max_size_mb=DEFAULT_MAX_OUTPUT_PDF_SIZE_MB):
+    """
+    Creates the searchable PDF with the page stored as a 1-bit CCITT Group 4 image,
+    if the page is black-and-white. Typically a small fraction of the size of the
+    same page as JPEG.
+    Returns the PDF data as bytes, or None if the page isn't bilevel or the PDF
+    exceeds max_size_mb
+    """
+    if not is_bilevel_page(image):
+        return None
+    
+    pdf_data = create_pdf_with_image(encode_bilevel(image), ocr_results)
+    if len(pdf_data) > max_size_mb * 1024 * 1024:
+        return None
+    logger.info(f"Stored black-and-white page as CCITT G4: {len(pdf_data) / 1024:.0f}KB")
+    return pdf_data
+
+def downscale_image(image, max_dimension):
+    """
+    Downscales the image so its longer side is max_dimension, keeping the aspect
+    ratio. Uses OpenCV's area interpolation, which is SIMD-vectorized and several
+    times faster than Pillow's LANCZOS on full pages.
+    Returns a new image
+    """
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    width, height = image.size
+    scale = max_dimension / max(width, height)
+    new_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return PILImage.fromarray(cv2.resize(np.asarray(image), new_size, interpolation=cv2.INTER_AREA))
+
+def estimate_pdf_size(jpeg_size, n_boxes, n_chars):
+    """
+    Upper bound on the size of the PDF create_pdf_with_image builds from a JPEG
+    of jpeg_size bytes with n_boxes OCR boxes holding n_chars characters of text.
+    Returns the estimated size in bytes
+    """
+    return jpeg_size + PDF_BASE_OVERHEAD_BYTES + PDF_BYTES_PER_OCR_BOX * n_boxes + PDF_BYTES_PER_OCR_CHAR * n_chars
+
+def search_compression_levels(levels, encode_level, ocr_results, max_size_bytes, describe):
+    """
+    Binary-searches compression levels, ordered from best quality to smallest
+    output, for the first level whose PDF fits within max_size_bytes.
+    encode_level(level) returns (jpeg_data, ocr_scale). Output size is assumed to
+    shrink along the list, so only about log2(len(levels)) levels are encoded.
+    The PDF size is predicted from the JPEG size; a PDF is only built to measure
+    it when the prediction is too close to the limit to decide.
+    Returns (level, pdf_data); level is None if even the last level is too large,
+    in which case pdf_data is the PDF for the last level.
+    """
+    encoded_levels = {}
+    built_pdfs = {}
+    n_chars = sum(len(text) for (_, text, _) in ocr_results)
+    
+    def encode(index):
+        if index not in encoded_levels:
+            encoded_levels[index] = encode_level(levels[index])
+            logger.info(f"{describe(levels[index])}: JPEG {len(encoded_levels[index][0]) / 1024 / 1024:.1f}MB")
+        return encoded_levels[index]
+    
+    def build(index):
+        if index not in built_pdfs:
+            jpeg_data, ocr_scale = encode(index)
+            built_pdfs[index] = create_pdf_with_image(jpeg_data, ocr_results, scale=ocr_scale)
+        return built_pdfs[index]
+    
+    def fits(index):
+        jpeg_size = len(encode(index)[0])
+        if estimate_pdf_size(jpeg_size, len(ocr_results), n_chars) <= max_size_bytes:
+            return True
+        if jpeg_size + PDF_MIN_OVERHEAD_BYTES > max_size_bytes:
+            return False
+        # Too close to call from the estimate: build it and measure
+        return len(build(index)) <= max_size_bytes
+    
+    low, high = 0, len(levels) - 1
+    best_index = None
+    while low <= high:
+        middle = (low + high) // 2
+        if fits(middle):
+            best_index = middle
+            high = middle - 1
+        else:
+            low = middle + 1
+    
+    if best_index is None:
+        return None, build(len(levels) - 1)
+    return levels[best_index], build(best_index)
+
+def create_searchable_pdf(image, ocr_results, max_size_mb=DEFAULT_MAX_OUTPUT_PDF_SIZE_MB):
     """
     Creates a searchable PDF with the original image and OCR text overlay.
-    Compresses the image if the resulting PDF exceeds max_size_mb.
+    The image is embedded as JPEG at RASTER_JPEG_QUALITY, or at lower qualities
+    and sizes if the resulting PDF would exceed max_size_mb.
+    Returns (pdf_data, compression_settings); compression_settings describes the
+    level chosen, for create_searchable_pdf_with_settings to apply to later pages.
     """
     from PIL import Image as PILImage
-    import io
     
     # Check image dimensions and reduce if too large
     max_pixels = 50_000_000  # 50 megapixels - reasonable limit
@@ -139,181 +536,96 @@ def create_searchable_pdf(image, ocr_results, output_path, max_size_mb=DEFAULT_M
     
     max_size_bytes = max_size_mb * 1024 * 1024
     
-    # Try creating PDF with original image first
-    temp_output = output_path + ".temp"
-    
-    def create_pdf_with_image(img, ocr_data, path):
-        """Helper function to create PDF with given image and OCR data"""
-        img_width, img_height = img.size
-        c = canvas.Canvas(path, pagesize=(img_width, img_height))
-        
-        # Add the image as background
-        img_reader = ImageReader(img)
-        c.drawImage(img_reader, 0, 0, width=img_width, height=img_height)
-        
-        # Add invisible OCR text overlay
-        for (bbox, text, confidence) in ocr_data:
-            if confidence > 0.5:
-                x1, y1 = bbox[0]
-                x3, y3 = bbox[2]
-                
-                x = x1
-                y = img_height - y3
-                width = x3 - x1
-                height = y3 - y1
-                
-                c.setFillColorRGB(0, 0, 0, alpha=0)
-                c.setFont("Helvetica", max(8, height * 0.8))
-                c.drawString(x, y, text)
-        
-        c.save()
-        return os.path.getsize(path)
-    
-    # Create initial PDF
-    file_size = create_pdf_with_image(image, ocr_results, temp_output)
-    
-    # If file is within size limit, use it
-    if file_size <= max_size_bytes:
-        os.rename(temp_output, output_path)
-        return
-    
-    # File is too large, need to compress
-    logger.info(f"PDF size ({file_size / 1024 / 1024:.1f}MB) exceeds limit ({max_size_mb}MB), compressing...")
+    # Convert to RGB once; encoding doesn't modify the image, so no copy is needed
+    compressed_image = flatten_to_rgb(image)
     
-    # Start with conservative compression - try JPEG quality reduction first
-    compressed_image = image.copy()
+    # Try different JPEG quality levels before resizing, starting from the quality
+    # the page was rasterized at: re-encoding at that quality adds almost no loss,
+    # and is far smaller and faster to write than the raw pixels
+    quality, pdf_data = search_compression_levels(
+        [RASTER_JPEG_QUALITY, 90, 80, 70, 60],
+        lambda quality: (encode_jpeg(compressed_image, quality), (1.0, 1.0)),
+        ocr_results,
+        max_size_bytes,
+        lambda quality: f"JPEG quality {quality}"
+    )
     
-    # Convert to RGB if RGBA for better compression
-    if compressed_image.mode == 'RGBA':
-        rgb_image = PILImage.new('RGB', compressed_image.size, (255, 255, 255))
-        rgb_image.paste(compressed_image, mask=compressed_image.split()[-1])
-        compressed_image = rgb_image
-    
-    # Try different JPEG quality levels before resizing
-    for quality in [90, 80, 70, 60]:
-        jpeg_buffer = io.BytesIO()
-        compressed_image.save(jpeg_buffer, format='JPEG', quality=quality, optimize=True)
-        jpeg_buffer.seek(0)
-        test_image = PILImage.open(jpeg_buffer)
-        
-        # Test PDF size with this compression
-        test_size = create_pdf_with_image(test_image, ocr_results, temp_output)
-        
-        if test_size <= max_size_bytes:
-            # Cache the successful JPEG compression settings
-            create_searchable_pdf._last_compression_settings = {
-                'method': 'jpeg_only',
-                'jpeg_quality': quality
-            }
-            logger.info(f"Achieved target size with JPEG quality {quality}: {test_size / 1024 / 1024:.1f}MB")
-            logger.info(f"Cached compression settings: JPEG quality {quality}")
-            os.rename(temp_output, output_path)
-            return
-        
-        logger.info(f"JPEG quality {quality} still too large: {test_size / 1024 / 1024:.1f}MB")
+    if quality is not None:
+        # Cache the successful JPEG compression settings
+        compression_settings = {
+            'method': 'jpeg_only',
+            'jpeg_quality': quality
+        }
+        logger.info(f"Achieved target size with JPEG quality {quality}: {len(pdf_data) / 1024 / 1024:.1f}MB")
+        logger.info(f"Cached compression settings: JPEG quality {quality}")
+        return pdf_data, compression_settings
     
     # If JPEG compression alone isn't enough, try gradual resizing
     original_width, original_height = image.size
     max_dimension = max(original_width, original_height)
     
-    # Try different resize levels
-    for resize_factor in [0.9, 0.8, 0.7, 0.6, 0.5]:
+    def encode_resized(resize_factor):
+        """Resizes the image by resize_factor and encodes it at JPEG quality 75"""
         target_dimension = int(max_dimension * resize_factor)
-        
-        # Don't go below reasonable resolution
-        if target_dimension < 600:
-            break
-            
-        compressed_image = image.copy()
-        compressed_image.thumbnail((target_dimension, target_dimension), PILImage.LANCZOS)
-        
-        # Convert to RGB if needed
-        if compressed_image.mode == 'RGBA':
-            rgb_image = PILImage.new('RGB', compressed_image.size, (255, 255, 255))
-            rgb_image.paste(compressed_image, mask=compressed_image.split()[-1])
-            compressed_image = rgb_image
-        
-        # Apply moderate JPEG compression
-        jpeg_buffer = io.BytesIO()
-        compressed_image.save(jpeg_buffer, format='JPEG', quality=75, optimize=True)
-        jpeg_buffer.seek(0)
-        compressed_image = PILImage.open(jpeg_buffer)
+        resized_image = downscale_image(compressed_image, target_dimension)
         
         # Scale OCR coordinates to match resized image
-        new_width, new_height = compressed_image.size
+        new_width, new_height = resized_image.size
         width_scale = new_width / original_width
         height_scale = new_height / original_height
         
-        scaled_ocr_results = []
-        for (bbox, text, confidence) in ocr_results:
-            scaled_bbox = []
-            for point in bbox:
-                scaled_x = point[0] * width_scale
-                scaled_y = point[1] * height_scale
-                scaled_bbox.append([scaled_x, scaled_y])
-            scaled_ocr_results.append((scaled_bbox, text, confidence))
-        
-        # Test PDF size with this compression
-        test_size = create_pdf_with_image(compressed_image, scaled_ocr_results, temp_output)
+        # Apply moderate JPEG compression
+        return encode_jpeg(resized_image, 75), (width_scale, height_scale)
+    
+    # Try different resize levels, without going below reasonable resolution
+    resize_factors = [factor for factor in [0.9, 0.8, 0.7, 0.6, 0.5] if int(max_dimension * factor) >= 600]
+    
+    if resize_factors:
+        resize_factor, resized_pdf_data = search_compression_levels(
+            resize_factors,
+            encode_resized,
+            ocr_results,
+            max_size_bytes,
+            lambda factor: f"Resize to {factor*100:.0f}%"
+        )
         
-        if test_size <= max_size_bytes:
+        if resize_factor is not None:
             # Cache the successful resize + JPEG compression settings
-            create_searchable_pdf._last_compression_settings = {
+            compression_settings = {
                 'method': 'resize_and_jpeg',
                 'resize_factor': resize_factor,
                 'jpeg_quality': 75
             }
-            logger.info(f"Achieved target size with {resize_factor*100:.0f}% resize: {test_size / 1024 / 1024:.1f}MB")
+            logger.info(f"Achieved target size with {resize_factor*100:.0f}% resize: {len(resized_pdf_data) / 1024 / 1024:.1f}MB")
             logger.info(f"Cached compression settings: {resize_factor*100:.0f}% resize + JPEG quality 75")
-            os.rename(temp_output, output_path)
-            return
+            return resized_pdf_data, compression_settings
         
-        logger.info(f"Resize to {resize_factor*100:.0f}% still too large: {test_size / 1024 / 1024:.1f}MB")
-    
-    # If we get here, use the last compressed version (it's the best we can do)
-    logger.warning(f"Could not achieve target size, using maximum compression: {test_size / 1024 / 1024:.1f}MB")
-    os.rename(temp_output, output_path)
-    
-    # Cache the compression settings for subsequent pages
-    if file_size <= max_size_bytes:
-        # No compression was needed
-        create_searchable_pdf._last_compression_settings = {
-            'method': 'no_compression'
-        }
-        logger.info("Cached compression settings: no compression needed")
-        os.rename(temp_output, output_path)
-        return
-    
-    # If we get here, use the last compressed version (it's the best we can do)
-    logger.warning(f"Could not achieve target size, using maximum compression: {test_size / 1024 / 1024:.1f}MB")
-    
-    # Cache the final compression settings used
-    if 'resize_factor' in locals():
-        create_searchable_pdf._last_compression_settings = {
+        # Smallest resize level still too large; it's the best we can do
+        pdf_data = resized_pdf_data
+        compression_settings = {
             'method': 'resize_and_jpeg',
-            'resize_factor': resize_factor,
+            'resize_factor': resize_factors[-1],
             'jpeg_quality': 75
         }
-        logger.info(f"Cached compression settings: {resize_factor*100:.0f}% resize + JPEG quality 75")
+        logger.info(f"Cached compression settings: {resize_factors[-1]*100:.0f}% resize + JPEG quality 75")
     else:
-        create_searchable_pdf._last_compression_settings = {
+        compression_settings = {
             'method': 'jpeg_only',
             'jpeg_quality': 60  # Last quality tried
         }
         logger.info("Cached compression settings: JPEG quality 60")
     
-    os.rename(temp_output, output_path)
-    
-    final_size = os.path.getsize(output_path)
-    logger.info(f"Final PDF size: {final_size / 1024 / 1024:.1f}MB")
+    # If we get here, use the most compressed version (it's the best we can do)
+    logger.warning(f"Could not achieve target size, using maximum compression: {len(pdf_data) / 1024 / 1024:.1f}MB")
+    return pdf_data, compression_settings
 
-def create_searchable_pdf_with_settings(image, ocr_results, output_path, max_size_mb=DEFAULT_MAX_OUTPUT_PDF_SIZE_MB, compression_settings=None):
+def create_searchable_pdf_with_settings(image, ocr_results, max_size_mb=DEFAULT_MAX_OUTPUT_PDF_SIZE_MB, compression_settings=None):
     """
     Creates a searchable PDF using pre-determined compression settings.
     Used for subsequent pages after optimal settings are found on the first page.
+    Returns the PDF data as bytes.
     """
     from PIL import Image as PILImage
-    import io
     
     # Check image dimensions and reduce if too large
     max_pixels = 50_000_000  # 50 megapixels - reasonable limit
@@ -327,216 +639,309 @@ def create_searchable_pdf_with_settings(image, ocr_results, output_path, max_siz
         image = image.resize((new_width, new_height), PILImage.LANCZOS)
         logger.info(f"Resized to {new_width}x{new_height} ({new_width * new_height:,} pixels)")
     
-    def create_pdf_with_image(img, ocr_data, path):
-        """Helper function to create PDF with given image and OCR data"""
-        img_width, img_height = img.size
-        c = canvas.Canvas(path, pagesize=(img_width, img_height))
-        
-        # Add the image as background
-        img_reader = ImageReader(img)
-        c.drawImage(img_reader, 0, 0, width=img_width, height=img_height)
-        
-        # Add invisible OCR text overlay
-        for (bbox, text, confidence) in ocr_data:
-            if confidence > 0.5:
-                x1, y1 = bbox[0]
-                x3, y3 = bbox[2]
-                
-                x = x1
-                y = img_height - y3
-                width = x3 - x1
-                height = y3 - y1
-                
-                c.setFillColorRGB(0, 0, 0, alpha=0)
-                c.setFont("Helvetica", max(8, height * 0.8))
-                c.drawString(x, y, text)
-        
-        c.save()
-        return os.path.getsize(path)
-    
     # If no compression settings provided, fall back to full optimization
     if compression_settings is None:
-        return create_searchable_pdf(image, ocr_results, output_path, max_size_mb)
+        return create_searchable_pdf(image, ocr_results, max_size_mb)[0]
     
     # Apply the cached compression settings
-    compressed_image = image.copy()
     original_width, original_height = image.size
     
     # Convert to RGB if RGBA for better compression
-    if compressed_image.mode == 'RGBA':
-        rgb_image = PILImage.new('RGB', compressed_image.size, (255, 255, 255))
-        rgb_image.paste(compressed_image, mask=compressed_image.split()[-1])
-        compressed_image = rgb_image
+    compressed_image = flatten_to_rgb(image)
     
     # Apply cached compression settings
     if compression_settings['method'] == 'jpeg_only':
         # Apply JPEG compression only
-        jpeg_buffer = io.BytesIO()
-        compressed_image.save(jpeg_buffer, format='JPEG', quality=compression_settings['jpeg_quality'], optimize=True)
-        jpeg_buffer.seek(0)
-        compressed_image = PILImage.open(jpeg_buffer)
+        jpeg_data = encode_jpeg(compressed_image, compression_settings['jpeg_quality'])
         
-        create_pdf_with_image(compressed_image, ocr_results, output_path)
+        pdf_data = create_pdf_with_image(jpeg_data, ocr_results)
         
-    elif compression_settings['method'] == 'resize_and_jpeg':
-        # Apply resize and JPEG compression
+    else:
+        # 'resize_and_jpeg': apply resize and JPEG compression
         target_dimension = int(max(original_width, original_height) * compression_settings['resize_factor'])
-        compressed_image.thumbnail((target_dimension, target_dimension), PILImage.LANCZOS)
+        compressed_image = downscale_image(compressed_image, target_dimension)
         
         # Apply JPEG compression
-        jpeg_buffer = io.BytesIO()
-        compressed_image.save(jpeg_buffer, format='JPEG', quality=compression_settings['jpeg_quality'], optimize=True)
-        jpeg_buffer.seek(0)
-        compressed_image = PILImage.open(jpeg_buffer)
+        jpeg_data = encode_jpeg(compressed_image, compression_settings['jpeg_quality'])
         
         # Scale OCR coordinates to match resized image
         new_width, new_height = compressed_image.size
         width_scale = new_width / original_width
         height_scale = new_height / original_height
         
-        scaled_ocr_results = []
-        for (bbox, text, confidence) in ocr_results:
-            scaled_bbox = []
-            for point in bbox:
-                scaled_x = point[0] * width_scale
-                scaled_y = point[1] * height_scale
-                scaled_bbox.append([scaled_x, scaled_y])
-            scaled_ocr_results.append((scaled_bbox, text, confidence))
+        pdf_data = create_pdf_with_image(jpeg_data, ocr_results, scale=(width_scale, height_scale))
+    
+    logger.info(f"Applied cached compression settings: {len(pdf_data) / 1024 / 1024:.1f}MB")
+    return pdf_data
+
+def scale_ocr_results(ocr_results, width_scale, height_scale):
+    """
+    Scales the bounding boxes of EasyOCR results, e.g. from a downscaled OCR
+    image back to page pixels.
+    Returns the scaled results list
+    """
+    if not ocr_results:
+        return ocr_results
+    bboxes = np.array([bbox for (bbox, _, _) in ocr_results], dtype=np.float64).reshape(-1, 4, 2)
+    bboxes *= (width_scale, height_scale)
+    return [(bbox, text, confidence) for bbox, (_, text, confidence) in zip(bboxes.tolist(), ocr_results)]
+
+def iter_ocr_batches(reader, images, pdf_name, progress_callback=None, batch_size=OCR_PAGE_BATCH_SIZE, page_offset=0, total_pages=None):
+    """
+    Runs EasyOCR over all page images, sending same-size pages through
+    readtext_batched so the detector processes several pages per forward pass.
+    Falls back to per-page readtext if a batch fails (e.g. CUDA out of memory).
+    images may be one chunk of a document: page_offset is the document index of
+    images[0] and total_pages the document's page count (for progress messages).
+    Yields (page_indices, ocr_results_list) per batch, with document page indices;
+    results are None for pages that failed.
+    """
+    if total_pages is None:
+        total_pages = len(images)
+    
+    # The detector needs identical input sizes within a batch, so group pages by size
+    pages_by_size = {}
+    for index, image in enumerate(images):
+        pages_by_size.setdefault(image.size, []).append(index)
+    
+    for page_size, page_indices in pages_by_size.items():
+        # Detection cost grows with pixel count and 300 DPI is more than the detector
+        # needs, so OCR runs on a downscaled copy; the page itself keeps full resolution
+        ocr_scale = min(1.0, OCR_MAX_LONG_EDGE / max(page_size))
+        ocr_size = (max(1, round(page_size[0] * ocr_scale)), max(1, round(page_size[1] * ocr_scale)))
         
-        create_pdf_with_image(compressed_image, scaled_ocr_results, output_path)
+        for start in range(0, len(page_indices), batch_size):
+            batch_indices = page_indices[start:start + batch_size]
+            page_numbers = [page_offset + i + 1 for i in batch_indices]
+            # Pages are grouped by size, so a batch isn't always a contiguous range
+            if page_numbers[-1] - page_numbers[0] + 1 == len(page_numbers):
+                page_label = f"{page_numbers[0]}-{page_numbers[-1]}"
+            else:
+                page_label = ", ".join(str(page_num) for page_num in page_numbers)
+            
+            if progress_callback:
+                if len(page_numbers) == 1:
+                    progress_callback(f"OCR processing page {page_numbers[0]}/{total_pages} of {pdf_name}...")
+                else:
+                    progress_callback(f"OCR processing pages {page_label}/{total_pages} of {pdf_name}...")
+            
+            # Convert to grayscale numpy arrays for EasyOCR; the recognizer works on
+            # grayscale anyway, and this avoids copying three channels per page
+            img_arrays = []
+            for i in batch_indices:
+                img_array = np.asarray(images[i].convert('L'))
+                if ocr_size != page_size:
+                    # OpenCV's SIMD area resize is faster than Pillow's and suits downscaling
+                    img_array = cv2.resize(img_array, ocr_size, interpolation=cv2.INTER_AREA)
+                img_arrays.append(img_array)
+            
+            try:
+                with ocr_inference_context():
+                    batch_results = reader.readtext_batched(img_arrays, batch_size=OCR_RECOGNIZER_BATCH_SIZE)
+            except Exception as e:
+                logger.warning(f"Batched OCR failed for pages {page_label} of {pdf_name}, retrying per page: {e}")
+                batch_results = []
+                for i, img_array in zip(batch_indices, img_arrays):
+                    try:
+                        with ocr_inference_context():
+                            batch_results.append(reader.readtext(img_array, batch_size=OCR_RECOGNIZER_BATCH_SIZE))
+                    except Exception as page_error:
+                        logger.warning(f"OCR failed for page {page_offset + i + 1} of {pdf_name}: {page_error}")
+                        batch_results.append(None)
+            
+            if ocr_size != page_size:
+                # Map boxes back to page pixels
+                batch_results = [scale_ocr_results(ocr_results, page_size[0] / ocr_size[0], page_size[1] / ocr_size[1])
+                                 if ocr_results is not None else None
+                                 for ocr_results in batch_results]
+            
+            yield [page_offset + i for i in batch_indices], batch_results
+
+def write_temp_pdf(pdf_data):
+    """
+    Writes PDF bytes to a temporary file, so each chunk rasterize_pdf converts
+    reads the document from disk instead of writing its own copy.
+    The caller removes the file with remove_temp_pdf when done.
+    Returns the file path
+    """
+    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_file:
+        temp_file.write(pdf_data)
+    return temp_file.name
+
+def remove_temp_pdf(pdf_path):
+    """
+    Deletes a file written by write_temp_pdf, logging rather than raising on failure.
+    Returns None
+    """
+    try:
+        os.remove(pdf_path)
+    except OSError as e:
+        logger.warning(f"Could not remove temporary file {pdf_path}: {e}")
+
+def rasterize_pdf(pdf_path, pdf_name, first_page=None, last_page=None):
+    """
+    Converts a PDF file to page images, choosing the DPI from the file size and
+    shrinking pages above 50 megapixels.
+    first_page/last_page (1-based, inclusive) limit conversion to a page range.
+    Safe to run on a background thread; the heavy lifting happens in poppler processes.
+    Returns a list of PIL images
+    """
+    # Convert PDF to images using pdf2image
+    file_size_mb = os.path.getsize(pdf_path) / 1024 / 1024
+    
+    # Use lower DPI for larger files to prevent memory issues
+    if file_size_mb > 20:
+        dpi = 200  # Lower DPI for large files
+    elif file_size_mb > 10:
+        dpi = 250  # Medium DPI for medium files
+    else:
+        dpi = 300  # Full DPI for smaller files
+    
+    # Split the page range across poppler processes; each one parses the PDF once
+    # and renders a contiguous run of pages, so give each process about four pages
+    chunk_pages = last_page - (first_page or 1) + 1 if last_page else RASTER_CHUNK_PAGES
+    thread_count = min(os.cpu_count() or 1, max(1, chunk_pages // 4))
+    
+    page_range = f" pages {first_page or 1}-{last_page}" if last_page else ""
+    logger.info(f"Converting {pdf_name}{page_range} ({file_size_mb:.1f}MB) at {dpi} DPI using up to {thread_count} thread(s)")
+    # JPEG output is far smaller to pipe back from poppler than raw PPM, and pages
+    # are only decoded when first accessed
+    images = convert_from_path(
+        pdf_path,
+        dpi=dpi,
+        first_page=first_page,
+        last_page=last_page,
+        thread_count=thread_count,
+        fmt='jpeg',
+        jpegopt={'quality': RASTER_JPEG_QUALITY}
+    )
+    page_offset = (first_page or 1) - 1
     
+    # Check and resize images if they're too large
+    max_pixels = 50_000_000  # 50 megapixels
+    
+    def limit_image_size(i, image):
+        current_pixels = image.size[0] * image.size[1]
+        if current_pixels > max_pixels:
+            logger.info(f"Page {page_offset + i + 1} too large ({current_pixels:,} pixels), resizing...")
+            scale_factor = (max_pixels / current_pixels) ** 0.5
+            new_width = int(image.size[0] * scale_factor)
+            new_height = int(image.size[1] * scale_factor)
+            image = image.resize((new_width, new_height), PILImage.LANCZOS)
+            logger.info(f"Page {page_offset + i + 1} resized to {new_width}x{new_height}")
+        return image
+    
+    oversized_pages = sum(1 for image in images if image.size[0] * image.size[1] > max_pixels)
+    if oversized_pages > 1:
+        # PIL releases the GIL while resampling, so oversize pages resize in parallel
+        with ThreadPoolExecutor(max_workers=min(thread_count, oversized_pages)) as resize_executor:
+            images = list(resize_executor.map(limit_image_size, range(len(images)), images))
     else:
-        # No compression needed
-        create_pdf_with_image(compressed_image, ocr_results, output_path)
+        images = [limit_image_size(i, image) for i, image in enumerate(images)]
     
-    final_size = os.path.getsize(output_path)
-    logger.info(f"Applied cached compression settings: {final_size / 1024 / 1024:.1f}MB")
+    return images
 
-def process_single_pdf(pdf_file, pdf_name, max_output_size_mb=DEFAULT_MAX_OUTPUT_PDF_SIZE_MB, progress_callback=None):
+def process_single_pdf(pdf_file, pdf_name, max_output_size_mb=DEFAULT_MAX_OUTPUT_PDF_SIZE_MB, progress_callback=None, rasterized_pages=None, reader=None, page_count=None, pdf_path=None):
     """
     Processes a single PDF file using pure Python libraries.
+    rasterized_pages is an optional future for rasterize_pdf's result for the
+    first RASTER_CHUNK_PAGES pages, when they were converted ahead of time. reader is the EasyOCR reader to use; if
+    omitted, the shared reader is looked up (and the GPU status shown).
+    page_count is the document's page count if already known (count_pdf_pages is
+    used otherwise). pdf_path is a copy of the PDF written by write_temp_pdf, which
+    stays owned by the caller; without it a temporary copy is written and removed here.
     Returns (processed_pdfs, error_message)
     """
-    processed_pdfs = []
+    # Read the upload once and reuse the bytes for validation and conversion
+    pdf_data = pdf_file.getvalue()
     
     # Validate PDF first
-    is_valid, validation_error = validate_pdf_file(pdf_file, pdf_name)
+    is_valid, validation_error = validate_pdf_file(pdf_data, pdf_name)
     if not is_valid:
         logger.error(f"Validation failed for {pdf_name}: {validation_error}")
         return [], validation_error
     
-    temp_dir = None
-    reader = None
-    
     try:
-        temp_dir = tempfile.mkdtemp()
-        logger.info(f"Processing {pdf_name} in {temp_dir}")
+        logger.info(f"Processing {pdf_name}")
         
         if progress_callback:
             progress_callback(f"Initializing OCR for {pdf_name}...")
         
-        # Initialize EasyOCR reader with GPU detection
         if reader is None:
+            # Get the shared EasyOCR reader with GPU detection
             gpu_available, gpu_info = check_gpu_availability()
             logger.info(f"GPU status: {gpu_info}")
             
             if gpu_available:
                 st.info(f"🚀 Using GPU acceleration: {gpu_info}")
-                reader = easyocr.Reader(['en'], gpu=True)
             else:
                 st.info(f"💻 Using CPU processing: {gpu_info}")
-                reader = easyocr.Reader(['en'], gpu=False)
+            reader = get_ocr_reader(gpu_available)
         
         if progress_callback:
             progress_callback(f"Converting {pdf_name} to images...")
         
-        # Convert PDF to images using pdf2image
-        pdf_file.seek(0)
-        file_size_mb = len(pdf_file.getvalue()) / 1024 / 1024
-        
-        # Use lower DPI for larger files to prevent memory issues
-        if file_size_mb > 20:
-            dpi = 200  # Lower DPI for large files
-        elif file_size_mb > 10:
-            dpi = 250  # Medium DPI for medium files
-        else:
-            dpi = 300  # Full DPI for smaller files
-            
-        logger.info(f"Converting {pdf_name} ({file_size_mb:.1f}MB) at {dpi} DPI")
-        images = convert_from_bytes(pdf_file.getvalue(), dpi=dpi)
-        
-        if not images:
+        # Rasterize in chunks of RASTER_CHUNK_PAGES so long documents never hold
+        # every decoded page at once
+        total_pages = page_count
+        if total_pages is None:
+            total_pages = count_pdf_pages(pdf_file.file_id, pdf_data)
+        if not total_pages:
             return [], f"No pages could be extracted from {pdf_name}"
         
-        # Check and resize images if they're too large
-        max_pixels = 50_000_000  # 50 megapixels
-        processed_images = []
+        # Every chunk is converted from the same file on disk
+        owns_pdf_path = pdf_path is None
+        if owns_pdf_path:
+            pdf_path = write_temp_pdf(pdf_data)
         
-        for i, image in enumerate(images):
-            current_pixels = image.size[0] * image.size[1]
-            if current_pixels > max_pixels:
-                logger.info(f"Page {i+1} too large ({current_pixels:,} pixels), resizing...")
-                scale_factor = (max_pixels / current_pixels) ** 0.5
-                new_width = int(image.size[0] * scale_factor)
-                new_height = int(image.size[1] * scale_factor)
-                image = image.resize((new_width, new_height), PILImage.LANCZOS)
-                logger.info(f"Page {i+1} resized to {new_width}x{new_height}")
-            processed_images.append(image)
-        
-        images = processed_images  # Use the processed images
-        
-        total_pages = len(images)
         if progress_callback:
             progress_callback(f"Processing {total_pages} pages from {pdf_name}...")
         
         # Use current timestamp since we can't get creation time from uploaded file
         creation_date = datetime.now().strftime("%Y-%m-%d")
         
-        # Process each page image with EasyOCR
+        # Build page PDFs on background workers while the next batch is OCR'd.
+        # The first page to be built searches for the compression settings while
+        # holding settings_lock, so the other workers wait and then reuse them.
         compression_settings = None  # Cache for optimal compression settings
+        settings_lock = threading.Lock()
         
-        for page_num, image in enumerate(images, 1):
-            try:
-                if progress_callback:
-                    progress_callback(f"OCR processing page {page_num}/{total_pages} of {pdf_name}...")
-                
-                # Convert PIL image to numpy array for EasyOCR
-                img_array = np.array(image)
-                
-                # Perform OCR
-                ocr_results = reader.readtext(img_array)
-                
-                if progress_callback:
-                    progress_callback(f"Creating searchable PDF for page {page_num}/{total_pages} of {pdf_name}...")
-                
-                # Create searchable PDF with OCR text
-                output_uuid = uuid.uuid4()
-                output_pdf_name = f"{creation_date}-{output_uuid}.pdf"
-                output_pdf_path = os.path.join(temp_dir, output_pdf_name)
-                
-                # Create PDF with cached compression settings for pages after the first
-                if page_num == 1:
+        def build_page_pdf(image, ocr_results):
+            """Creates the searchable PDF for one page, reusing cached compression settings"""
+            nonlocal compression_settings
+            # Black-and-white pages are stored as 1-bit images whatever the cached
+            # settings, which only describe how color and grayscale pages are compressed
+            page_pdf_data = create_bilevel_pdf(image, ocr_results, max_size_mb=max_output_size_mb)
+            if page_pdf_data is not None:
+                return page_pdf_data
+            with settings_lock:
+                if compression_settings is None:
                     # First page: find optimal compression and cache it
-                    create_searchable_pdf(image, ocr_results, output_pdf_path, max_size_mb=max_output_size_mb)
-                    # Extract compression settings from the first page processing
-                    compression_settings = getattr(create_searchable_pdf, '_last_compression_settings', None)
-                else:
-                    # Subsequent pages: use cached compression settings
-                    create_searchable_pdf_with_settings(image, ocr_results, output_pdf_path, max_size_mb=max_output_size_mb, compression_settings=compression_settings)
+                    page_pdf_data, compression_settings = create_searchable_pdf(image, ocr_results, max_size_mb=max_output_size_mb)
+                    return page_pdf_data
+            # Subsequent pages: use cached compression settings
+            return create_searchable_pdf_with_settings(image, ocr_results, max_size_mb=max_output_size_mb, compression_settings=compression_settings)
+        
+        page_outputs = [None] * total_pages
+        pending_pages = deque()
+        
+        def collect_page(page_index, future):
+            """Waits for a page's PDF and records it (runs on the calling thread)"""
+            page_num = page_index + 1
+            try:
+                page_pdf_data = future.result()
                 
-                # Verify output file was created and has content
-                if not os.path.exists(output_pdf_path) or os.path.getsize(output_pdf_path) == 0:
+                # Verify output has content
+                if not page_pdf_data:
                     logger.warning(f"OCR failed to create output for page {page_num}")
-                    continue
-                
-                # Read the processed PDF data
-                with open(output_pdf_path, "rb") as f:
-                    pdf_data = f.read()
+                    return
                 
-                processed_pdfs.append({
-                    'name': output_pdf_name,
-                    'data': pdf_data
-                })
+                # Create searchable PDF name
+                output_uuid = uuid.uuid4()
+                page_outputs[page_index] = {
+                    'name': f"{creation_date}-{output_uuid}.pdf",
+                    'data': page_pdf_data
+                }
                 
                 if progress_callback:
                     progress_callback(f"Completed page {page_num}/{total_pages} of {pdf_name}")
@@ -545,7 +950,57 @@ def process_single_pdf(pdf_file, pdf_name, max_output_size_mb=DEFAULT_MAX_OUTPUT
                 logger.warning(f"Failed to process page {page_num} of {pdf_name}: {e}")
                 if progress_callback:
                     progress_callback(f"Error on page {page_num}/{total_pages} of {pdf_name}: {str(e)}")
-                continue
+        
+        try:
+            with ThreadPoolExecutor(max_workers=PDF_BUILD_WORKERS) as pdf_executor, ThreadPoolExecutor(max_workers=1) as raster_executor:
+                # The first chunk may already have been rasterized in the background
+                next_chunk = rasterized_pages
+                if next_chunk is None:
+                    next_chunk = raster_executor.submit(rasterize_pdf, pdf_path, pdf_name, 1, min(RASTER_CHUNK_PAGES, total_pages))
+                
+                for chunk_start in range(1, total_pages + 1, RASTER_CHUNK_PAGES):
+                    images = next_chunk.result()
+                    page_offset = chunk_start - 1
+                    
+                    # Rasterize the following chunk while this one is OCR'd
+                    following_start = chunk_start + RASTER_CHUNK_PAGES
+                    if following_start <= total_pages:
+                        following_end = min(following_start + RASTER_CHUNK_PAGES - 1, total_pages)
+                        next_chunk = raster_executor.submit(rasterize_pdf, pdf_path, pdf_name, following_start, following_end)
+                    
+                    for page_indices, batch_results in iter_ocr_batches(reader, images, pdf_name, progress_callback, page_offset=page_offset, total_pages=total_pages):
+                        for page_index, ocr_results in zip(page_indices, batch_results):
+                            page_num = page_index + 1
+                            if ocr_results is None:
+                                images[page_index - page_offset] = None
+                                if progress_callback:
+                                    progress_callback(f"Error on page {page_num}/{total_pages} of {pdf_name}: OCR failed for this page")
+                                continue
+                            
+                            if progress_callback:
+                                progress_callback(f"Creating searchable PDF for page {page_num}/{total_pages} of {pdf_name}...")
+                            pending_pages.append((page_index, pdf_executor.submit(build_page_pdf, images[page_index - page_offset], ocr_results)))
+                            # Drop our reference to the raster; the worker releases it once the page
+                            # PDF is built, so decoded pages don't pile up for the whole document
+                            images[page_index - page_offset] = None
+                        
+                        # Report pages that finished while this batch was being OCR'd
+                        while pending_pages and pending_pages[0][1].done():
+                            collect_page(*pending_pages.popleft())
+                        
+                        # Don't let OCR run too far ahead of PDF building; each queued page
+                        # keeps its raster alive
+                        while len(pending_pages) > 2 * PDF_BUILD_WORKERS:
+                            collect_page(*pending_pages.popleft())
+                
+                # Wait for the remaining pages
+                while pending_pages:
+                    collect_page(*pending_pages.popleft())
+        finally:
+            if owns_pdf_path:
+                remove_temp_pdf(pdf_path)
+        
+        processed_pdfs = [output for output in page_outputs if output is not None]
         
         logger.info(f"Successfully processed {pdf_name}: {len(processed_pdfs)} pages")
         return processed_pdfs, None
@@ -558,26 +1013,23 @@ def process_single_pdf(pdf_file, pdf_name, max_output_size_mb=DEFAULT_MAX_OUTPUT
         error_msg = f"Unexpected error: {str(e)}"
         logger.error(f"Unexpected error processing {pdf_name}: {e}")
         return [], error_msg
-    finally:
-        # Ensure cleanup happens even on errors
-        if temp_dir and os.path.exists(temp_dir):
-            try:
-                shutil.rmtree(temp_dir)
-                logger.info(f"Cleaned up temporary directory for {pdf_name}")
-            except Exception as e:
-                logger.warning(f"Failed to cleanup {temp_dir}: {e}")
 
 def create_zip_archive(processed_pdfs):
     """
     Creates a ZIP archive containing all processed PDF files.
+    PDFs are stored without recompression since their image and content
+    streams are already compressed. The archive is built in a spooled temp file,
+    so large archives go to disk instead of being held in memory twice
+    (growing buffer plus the final bytes).
+    Returns the ZIP data as bytes
     """
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-        for pdf in processed_pdfs:
-            zip_file.writestr(pdf['name'], pdf['data'])
-    
-    zip_buffer.seek(0)
-    return zip_buffer
+    with tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_MAX_BYTES) as zip_buffer:
+        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_STORED) as zip_file:
+            for pdf in processed_pdfs:
+                zip_file.writestr(pdf['name'], pdf['data'])
+        
+        zip_buffer.seek(0)
+        return zip_buffer.read()
 
 def main():
     st.title("PDF OCR Processing Application")
@@ -595,11 +1047,10 @@ def main():
         st.write(f"Uploaded {len(uploaded_files)} file(s)")
         
         # Check external tools first
-        tools_available, missing_tools = check_external_tools()
-        if not tools_available:
-            st.error(f"Missing required Python libraries: {', '.join(missing_tools)}")
+        if MISSING_TOOLS:
+            st.error(f"Missing required Python libraries: {', '.join(MISSING_TOOLS)}")
             st.info("**Installation:**")
-            st.code("pip install easyocr pdf2image reportlab")
+            st.code("pip install easyocr pdf2image opencv-python-headless reportlab")
             return
         
         # Display GPU status
@@ -639,6 +1090,12 @@ def main():
             
             st.session_state.processed_results = []
             
+            # Results from earlier runs in this session, keyed by upload and settings,
+            # so unchanged files are not OCR'd again when the button is clicked again
+            if 'result_cache' not in st.session_state:
+                st.session_state.result_cache = {}
+            result_cache = st.session_state.result_cache
+            
             # Enhanced progress tracking
             progress_bar = st.progress(0)
             status_text = st.empty()
@@ -652,16 +1109,9 @@ def main():
             # First pass: count pages in each PDF for accurate progress
             status_text.text("Analyzing uploaded files...")
             for uploaded_file in uploaded_files:
-                try:
-                    uploaded_file.seek(0)
-                    pdf_reader = PdfReader(uploaded_file)
-                    page_count = len(pdf_reader.pages)
-                    file_page_counts[uploaded_file.name] = page_count
-                    total_pages += page_count
-                    uploaded_file.seek(0)  # Reset for processing
-                except Exception as e:
-                    file_page_counts[uploaded_file.name] = 1  # Assume 1 page if can't read
-                    total_pages += 1
+                page_count = count_pdf_pages(uploaded_file.file_id, uploaded_file.getvalue())
+                file_page_counts[uploaded_file.name] = page_count
+                total_pages += page_count or 1  # Assume 1 page if can't read
             
             processed_pages = 0
             
@@ -679,24 +1129,92 @@ def main():
             
             status_text.text(f"Processing {total_files} files ({total_pages} total pages)...")
             
-            for i, uploaded_file in enumerate(uploaded_files):
-                file_pages = file_page_counts.get(uploaded_file.name, 1)
-                update_progress(f"Starting {uploaded_file.name} ({file_pages} pages)...")
-                
-                processed_pdfs, error = process_single_pdf(
-                    uploaded_file, 
-                    uploaded_file.name, 
-                    max_output_size_mb=max_output_size,
-                    progress_callback=update_progress
-                )
+            current_cache_keys = set()
+            reader = None  # Loaded when the first file that needs OCR comes up
+            
+            # Rasterize the next file in the background while the current one is OCR'd;
+            # poppler runs in its own processes, so this overlaps with the OCR work.
+            # Each entry holds the file's temporary copy and the future for its first chunk
+            prefetch_executor = ThreadPoolExecutor(max_workers=1)
+            rasterize_futures = {}
+            
+            def prefetch_next_file(index):
+                """Starts rasterizing the next file after index that still needs processing"""
+                for next_file in uploaded_files[index + 1:]:
+                    if (next_file.file_id, max_output_size) in result_cache:
+                        continue
+                    if next_file.file_id not in rasterize_futures:
+                        next_data = next_file.getvalue()
+                        # Invalid files are left for process_single_pdf to report
+                        if validate_pdf_file(next_data, next_file.name)[0]:
+                            next_path = write_temp_pdf(next_data)
+                            rasterize_futures[next_file.file_id] = (next_path, prefetch_executor.submit(rasterize_pdf, next_path, next_file.name, 1, RASTER_CHUNK_PAGES))
+                    return
+            
+            # Streamlit stops or reruns the script by raising from st.* calls, so the
+            # prefetch thread and temporary copies are cleaned up on every exit path
+            pdf_path = None
+            try:
+                for i, uploaded_file in enumerate(uploaded_files):
+                    page_count = file_page_counts.get(uploaded_file.name)
+                    file_pages = page_count or 1
+                    cache_key = (uploaded_file.file_id, max_output_size)
+                    current_cache_keys.add(cache_key)
+                    
+                    if cache_key in result_cache:
+                        # Unchanged file and settings: reuse the earlier output
+                        processed_pdfs = result_cache[cache_key]
+                        st.session_state.processed_results.extend(processed_pdfs)
+                        processed_pages += file_pages
+                        progress = min(processed_pages / total_pages, 1.0)
+                        progress_bar.progress(progress)
+                        status_text.text(f"Progress: {processed_pages}/{total_pages} pages processed ({progress*100:.1f}%)")
+                        st.success(f"✅ Reused previous results for {uploaded_file.name} - {len(processed_pdfs)} searchable PDF(s)")
+                        detail_text.text(f"✅ Completed: {uploaded_file.name}")
+                        continue
+                    
+                    update_progress(f"Starting {uploaded_file.name} ({file_pages} pages)...")
+                    
+                    pdf_path, rasterized_pages = rasterize_futures.pop(uploaded_file.file_id, (None, None))
+                    prefetch_next_file(i)
+                    
+                    # GPU status is already shown above, so fetch the shared reader once here
+                    if reader is None:
+                        reader = get_ocr_reader(gpu_available)
+                    
+                    processed_pdfs, error = process_single_pdf(
+                        uploaded_file, 
+                        uploaded_file.name, 
+                        max_output_size_mb=max_output_size,
+                        progress_callback=update_progress,
+                        rasterized_pages=rasterized_pages,
+                        reader=reader,
+                        page_count=page_count,
+                        pdf_path=pdf_path
+                    )
+                    if pdf_path is not None:
+                        remove_temp_pdf(pdf_path)
+                        pdf_path = None
+                    
+                    if error:
+                        st.error(f"Error processing {uploaded_file.name}: {error}")
+                        detail_text.text(f"❌ Failed: {uploaded_file.name}")
+                    else:
+                        st.session_state.processed_results.extend(processed_pdfs)
+                        result_cache[cache_key] = processed_pdfs
+                        st.success(f"✅ Successfully processed {uploaded_file.name} - Created {len(processed_pdfs)} searchable PDF(s)")
+                        detail_text.text(f"✅ Completed: {uploaded_file.name}")
                 
-                if error:
-                    st.error(f"Error processing {uploaded_file.name}: {error}")
-                    detail_text.text(f"❌ Failed: {uploaded_file.name}")
-                else:
-                    st.session_state.processed_results.extend(processed_pdfs)
-                    st.success(f"✅ Successfully processed {uploaded_file.name} - Created {len(processed_pdfs)} searchable PDF(s)")
-                    detail_text.text(f"✅ Completed: {uploaded_file.name}")
+            finally:
+                prefetch_executor.shutdown(wait=False, cancel_futures=True)
+                if pdf_path is not None:
+                    remove_temp_pdf(pdf_path)
+                for prefetched_path, _ in rasterize_futures.values():
+                    remove_temp_pdf(prefetched_path)
+            
+            # Drop cached results for files that are no longer uploaded
+            for stale_key in set(result_cache) - current_cache_keys:
+                del result_cache[stale_key]
             
             # Final progress update
             progress_bar.progress(1.0)
@@ -706,22 +1224,25 @@ def main():
     # Display download buttons for processed files
     if 'processed_results' in st.session_state and st.session_state.processed_results:
         st.subheader("Download Processed PDFs")
+        processed_results = st.session_state.processed_results
+        
+        # Downloads use callables so the data is only handed to Streamlit when a
+        # button is clicked, instead of being copied into the media store on every rerun
         
         # Individual downloads
-        for result in st.session_state.processed_results:
+        for result in processed_results:
             st.download_button(
                 label=f"Download {result['name']}",
-                data=result['data'],
+                data=lambda result=result: result['data'],
                 file_name=result['name'],
                 mime="application/pdf"
             )
         
-        # ZIP archive download
+        # ZIP archive download (built on demand)
         st.subheader("Download All as ZIP Archive")
-        zip_buffer = create_zip_archive(st.session_state.processed_results)
         st.download_button(
             label="Download All PDFs as ZIP",
-            data=zip_buffer,
+            data=lambda: create_zip_archive(processed_results),
             file_name="processed_pdfs.zip",
             mime="application/zip"
         )